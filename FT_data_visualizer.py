@@ -6,22 +6,20 @@ Created on Thu Apr 10 19:42:50 2025
 """
 import streamlit as st
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from time_series_plotter import TimeSeriesPlotter
-import plotly.io as pio
+from plotter_session import load_plotter, wait_for_data
 import io
-from streamlit_plotly_events import plotly_events
 import numpy as np
+import data_export
 
 st.set_page_config(layout="wide")
 st.title("📈 Flight Test Data Visualizer")
 
 # File upload
 uploaded_file = st.file_uploader(
-    "Upload your CSV file", type="csv",
-    help="Upload a CSV file containing flight test time series data."
+    "Upload your CSV file", type=["csv", "gz", "zst"],
+    help="Upload a CSV file (optionally gzip or zstd compressed) containing flight test time series data."
 )
-delimiter = st.radio("Select CSV delimiter", [",", ";"], index=0, horizontal=True)
+delimiter = st.radio("Select CSV delimiter", ["Auto", ",", ";"], index=0, horizontal=True)
 # Default Plotly colors
 DEFAULT_COLORS = [
     "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728",
@@ -29,6 +27,12 @@ DEFAULT_COLORS = [
     "#bcbd22", "#17becf"
 ]
 
+DATA_EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/octet-stream"),
+    "NumPy": ("npz", "application/octet-stream")
+}
+
 # Plot style controls
 with st.sidebar:
     st.markdown("## ⚙️ Plot Settings")
@@ -55,6 +59,18 @@ with st.sidebar:
     export_format = st.radio("Export format", ["PNG", "HTML"], horizontal=True)
     export_button = st.button("📤 Export plot")
 
+    st.markdown("## 📦 Data Export")
+    data_format = st.radio("Data format", list(DATA_EXPORT_FORMATS), horizontal=True)
+    export_all_tests = st.checkbox("Testplot: export every test point (zip)", value=False)
+    data_export_button = st.button("📥 Export data")
+
+
+# st.download_button needs the whole payload; chunks are streamed into one buffer to keep a single copy
+def offer_data_download(chunks, file_name, mime):
+    buf = io.BytesIO()
+    data_export.write_chunks(chunks, buf)
+    st.download_button(f"Download {file_name}", buf.getvalue(), file_name=file_name, mime=mime)
+
 
 # Centralized plot builder
 def create_plotly_figure(data, grouping, x_title, y_titles, style_map):
@@ -62,6 +78,7 @@ def create_plotly_figure(data, grouping, x_title, y_titles, style_map):
         return None
 
     if grouping == 0 and len(data) > 1:
+        from plotly.subplots import make_subplots  # deferred: only needed for stacked plots
         fig = make_subplots(rows=len(data), cols=1, shared_xaxes=True, subplot_titles=y_titles)
         for i, trace in enumerate(data):
             name = trace["name"]
@@ -134,8 +151,8 @@ def create_plotly_figure(data, grouping, x_title, y_titles, style_map):
 
 # Main plotting logic
 if uploaded_file:
-    plotter = TimeSeriesPlotter(uploaded_file, delimiter=delimiter)
-    all_vars = [col for col in plotter.df.columns if col not in ["Time", "time_seconds", "time_from_zero"]]
+    plotter = load_plotter(uploaded_file, delimiter)
+    all_vars = [col for col in plotter.columns if col not in ["Time", "time_seconds", "time_from_zero"]]
     plot_type = st.selectbox("Choose plot type", ["Timeplot", "Testplot", "VarTimeplot", "VarTestplot"])
 
     if plot_type == "Timeplot":
@@ -145,6 +162,7 @@ if uploaded_file:
         tfin = st.text_input("End time (in seconds)", value="")
 
         if variables:
+            wait_for_data(plotter)
             st.markdown("### 🎨 Customize styles per variable")
             style_map = {}
             for i, var in enumerate(variables):
@@ -169,6 +187,12 @@ if uploaded_file:
                 }
 
             data = plotter.timeplot_data(variables, time_type=1, tini=float(tini), tfin=float(tfin) if tfin else None)
+
+            if data_export_button:
+                fmt, mime = DATA_EXPORT_FORMATS[data_format]
+                chunks = plotter.export_data(variables, fmt, time_type=1, tini=float(tini), tfin=float(tfin) if tfin else None)
+                offer_data_download(chunks, f"timeplot.{fmt}", mime)
+
             fig = create_plotly_figure(data, grouping, "Time (s)", [d["name"] for d in data], style_map)
 
             if fig:
@@ -181,13 +205,14 @@ if uploaded_file:
                         fig.write_image(buf, format="png")
                         st.download_button("Download PNG", buf.getvalue(), file_name="plot.png", mime="image/png")
                     elif export_format == "HTML":
-                        html = pio.to_html(fig, full_html=False)
+                        html = fig.to_html(full_html=False)
                         st.download_button("Download HTML", html, file_name="plot.html", mime="text/html")
 
 
     elif plot_type == "Testplot":
         variables = st.multiselect("Select variable(s) to plot", all_vars)
-        test_points = sorted(plotter.df["test_point"].dropna().unique().astype(int))
+        wait_for_data(plotter)
+        test_points = plotter.test_points
         test = st.selectbox("Select Test Point", options=test_points)
         active_value = st.radio("Active State", [0, 1], horizontal=True)
         grouping = 1 if st.checkbox("Group parameters in same plot") else 0
@@ -217,6 +242,16 @@ if uploaded_file:
                 }
 
             data = plotter.testplot_data(variables, test=test, active_value=active_value, time_type=1)
+
+            if data_export_button:
+                fmt, mime = DATA_EXPORT_FORMATS[data_format]
+                if export_all_tests:
+                    chunks = plotter.export_test_points(variables, fmt, active_value=active_value, time_type=1)
+                    offer_data_download(chunks, "test_points.zip", "application/zip")
+                else:
+                    chunks = plotter.export_data(variables, fmt, time_type=1, test=test, active_value=active_value)
+                    offer_data_download(chunks, f"test_point_{test}.{fmt}", mime)
+
             fig = create_plotly_figure(data, grouping, "Time (s)", [d["name"] for d in data], style_map)
 
             if fig:
@@ -228,7 +263,7 @@ if uploaded_file:
                         fig.write_image(buf, format="png")
                         st.download_button("Download PNG", buf.getvalue(), file_name="plot.png", mime="image/png")
                     elif export_format == "HTML":
-                        html = pio.to_html(fig, full_html=False)
+                        html = fig.to_html(full_html=False)
                         st.download_button("Download HTML", html, file_name="plot.html", mime="text/html")
 
 
@@ -240,6 +275,7 @@ if uploaded_file:
         tfin = st.text_input("End time (in seconds)", value="")
 
         if variable_x and variables_y:
+            wait_for_data(plotter)
             st.markdown("### 🎨 Customize styles per variable")
             style_map = {}
             for i, var in enumerate(variables_y):
@@ -275,14 +311,15 @@ if uploaded_file:
                         fig.write_image(buf, format="png")
                         st.download_button("Download PNG", buf.getvalue(), file_name="plot.png", mime="image/png")
                     elif export_format == "HTML":
-                        html = pio.to_html(fig, full_html=False)
+                        html = fig.to_html(full_html=False)
                         st.download_button("Download HTML", html, file_name="plot.html", mime="text/html")
 
 
     elif plot_type == "VarTestplot":
         variable_x = st.selectbox("Select variable for X-axis", all_vars, key="var_x_vartest")
         variables_y = st.multiselect("Select variable(s) for Y-axis", all_vars, key="var_y_vartest")
-        test_points = sorted(plotter.df["test_point"].dropna().unique().astype(int))
+        wait_for_data(plotter)
+        test_points = plotter.test_points
         test = st.selectbox("Select Test Point", options=test_points)
         active_value = st.radio("Active State", [0, 1], horizontal=True)
         grouping = 1 if st.checkbox("Group parameters in same plot") else 0
@@ -323,5 +360,5 @@ if uploaded_file:
                         fig.write_image(buf, format="png")
                         st.download_button("Download PNG", buf.getvalue(), file_name="plot.png", mime="image/png")
                     elif export_format == "HTML":
-                        html = pio.to_html(fig, full_html=False)
+                        html = fig.to_html(full_html=False)
                         st.download_button("Download HTML", html, file_name="plot.html", mime="text/html")
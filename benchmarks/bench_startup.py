@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Startup and time-to-first-plot benchmark.
+
+    python benchmarks/bench_startup.py [--rows 1000000] [--max-startup 1.5] [--max-first-plot 10]
+
+- startup: running the top-level imports of the pages (and plotter_session, which they
+  import) in a fresh interpreter, streamlit excluded. Also fails if any deferred heavy
+  module gets imported at startup again.
+- header: TimeSeriesPlotter(background=True) returning with the column names.
+- first plot: waiting for the background load, slicing a Timeplot and building its figure.
+Exits with status 1 if a --max-* limit is exceeded.
+"""
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STARTUP_FILES = ["FT_data_visualizer.py", "pages/*.py", "plotter_session.py"]
+SKIPPED_PACKAGES = {"streamlit", "plotter_session"}
+DEFERRED_MODULES = ["plotly.subplots", "plotly.io", "scipy.optimize", "scipy.signal", "streamlit_plotly_events"]
+
+STARTUP_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - t
+print(elapsed)
+print(",".join(m for m in {deferred!r} if m in sys.modules))
+"""
+
+
+def startup_imports():
+    """
+    Module-level import statements of the app files, as source lines.
+    """
+    statements = []
+    for pattern in STARTUP_FILES:
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+            for node in tree.body:
+                if isinstance(node, ast.Import):
+                    modules = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom):
+                    modules = [node.module or ""]
+                else:
+                    continue
+                if any(m.split(".")[0] in SKIPPED_PACKAGES for m in modules):
+                    continue
+                line = ast.unparse(node)
+                if line not in statements:
+                    statements.append(line)
+    return statements
+
+
+def bench_startup():
+    snippet = STARTUP_SNIPPET.format(imports="\n".join(startup_imports()), deferred=DEFERRED_MODULES)
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+    lines = out.stdout.split("\n")
+    return float(lines[0]), [m for m in lines[1].split(",") if m]
+
+
+def write_sample_csv(path, rows, channels=8, chunk=200_000):
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    for start in range(0, rows, chunk):
+        idx = start + np.arange(min(chunk, rows - start))
+        seconds = 36000 + idx * 0.02
+        df = pd.DataFrame(rng.standard_normal((len(idx), channels)), columns=[f"ch{i}" for i in range(channels)])
+        df.insert(0, "Time", [f"000:{int(s // 3600):02}:{int(s % 3600 // 60):02}:{s % 60:06.3f}" for s in seconds])
+        df["test_point"] = idx // 10_000
+        df["active"] = df["test_point"] % 2
+        df.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False, float_format="%.5f")
+
+
+def bench_first_plot(path):
+    from time_series_plotter import TimeSeriesPlotter
+    import plotly.graph_objects as go
+
+    t = time.perf_counter()
+    plotter = TimeSeriesPlotter(path, background=True)
+    header = time.perf_counter() - t
+
+    plotter.wait()
+    loaded = time.perf_counter() - t
+    data = plotter.timeplot_data(["ch0", "ch1"], time_type=1, tini=0.0)
+    fig = go.Figure([go.Scatter(x=d["x"], y=d["y"], name=d["name"]) for d in data])
+    fig.to_json()
+    first_plot = time.perf_counter() - t
+    return header, loaded, first_plot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-startup", type=float, default=None, help="seconds")
+    parser.add_argument("--max-first-plot", type=float, default=None, help="seconds")
+    args = parser.parse_args()
+
+    failed = False
+
+    startup, loaded_heavy = bench_startup()
+    print(f"startup imports:   {startup:8.3f} s")
+    if loaded_heavy:
+        print(f"  deferred modules imported at startup: {', '.join(loaded_heavy)}")
+        failed = True
+    if args.max_startup is not None and startup > args.max_startup:
+        failed = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sample.csv")
+        write_sample_csv(path, args.rows)
+        header, loaded, first_plot = bench_first_plot(path)
+    print(f"header ready:      {header:8.3f} s  ({args.rows} rows)")
+    print(f"data ready:        {loaded:8.3f} s")
+    print(f"first plot:        {first_plot:8.3f} s")
+    if args.max_first_plot is not None and first_plot > args.max_first_plot:
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming export of selected rows/columns of a DataFrame to CSV, Parquet or NumPy .npz.
+Every writer is a generator of bytes chunks, so the selection is never copied as a whole.
+"""
+import io
+import zipfile
+import numpy as np
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only, non-seekable file object that collects whatever is written
+    so a generator can hand it out and drop it.
+    """
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._pos
+
+    def write(self, b):
+        b = bytes(b)
+        self._parts.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _row_slices(rows, chunksize):
+    for start in range(0, len(rows), chunksize):
+        yield rows[start:start + chunksize]
+
+
+def _column_positions(df, columns):
+    # Positional indexing with iloc only copies the requested block, never df[columns] whole
+    return df.columns.get_indexer(columns)
+
+
+def iter_csv(df, rows, columns, chunksize=DEFAULT_CHUNKSIZE, delimiter=","):
+    """
+    Yields the CSV encoding of df.iloc[rows, columns] chunk by chunk.
+    """
+    cols = _column_positions(df, columns)
+    yield df.iloc[:0, cols].to_csv(index=False, sep=delimiter).encode("utf-8")
+    for part in _row_slices(rows, chunksize):
+        yield df.iloc[part, cols].to_csv(index=False, header=False, sep=delimiter).encode("utf-8")
+
+
+def iter_parquet(df, rows, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yields a Parquet file written one row group per chunk.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires the 'pyarrow' package.")
+
+    cols = _column_positions(df, columns)
+    sink = _ChunkSink()
+    schema = pa.Schema.from_pandas(df.iloc[:0, cols], preserve_index=False)
+    for i, field in enumerate(schema):
+        # Empty object columns infer as null; in this data they hold text
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    with pq.ParquetWriter(sink, schema) as writer:
+        for part in _row_slices(rows, chunksize):
+            table = pa.Table.from_pandas(df.iloc[part, cols], schema=schema, preserve_index=False)
+            writer.write_table(table)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _npy_dtype(series, rows, chunksize):
+    """
+    Fixed numpy dtype for a column. Strings need a scan of the selection
+    because .npy stores them with a fixed width.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind != "O":
+        return dtype
+    if getattr(dtype, "kind", "O") in "biuf":
+        return np.dtype(np.float64)  # nullable numeric extension types
+    width = 1
+    for part in _row_slices(rows, chunksize):
+        width = max(width, _npy_strings(series.iloc[part]).dtype.itemsize // 4)
+    return np.dtype(f"<U{width}")
+
+
+def _npy_strings(values):
+    # numpy's own str conversion: missing values become "nan", same as when writing
+    return values.to_numpy(dtype=object).astype(str)
+
+
+def iter_npz(df, rows, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yields an uncompressed .npz archive with one array per column,
+    each array written to its .npy member chunk by chunk.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for col in columns:
+            series = df[col]
+            dtype = _npy_dtype(series, rows, chunksize)
+            header = {"descr": np.lib.format.dtype_to_descr(dtype),
+                      "fortran_order": False, "shape": (len(rows),)}
+            with zf.open(f"{col}.npy", mode="w", force_zip64=True) as member:
+                np.lib.format.write_array_header_2_0(member, header)
+                for part in _row_slices(rows, chunksize):
+                    values = series.iloc[part]
+                    values = _npy_strings(values) if dtype.kind == "U" else values.to_numpy(dtype=dtype)
+                    member.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+                    yield sink.drain()
+    yield sink.drain()
+
+
+ITER_WRITERS = {"csv": iter_csv, "parquet": iter_parquet, "npz": iter_npz}
+
+
+def iter_export(df, rows, columns, fmt="csv", chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Dispatches to the writer for `fmt` ("csv", "parquet" or "npz").
+    """
+    if fmt not in ITER_WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return ITER_WRITERS[fmt](df, rows, columns, chunksize=chunksize)
+
+
+def iter_zip(entries):
+    """
+    Yields a zip archive built from (filename, bytes-chunk generator) pairs,
+    writing each member as its chunks arrive.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in entries:
+            with zf.open(name, mode="w", force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    yield sink.drain()
+    yield sink.drain()
+
+
+def write_chunks(chunks, dest):
+    """
+    Writes a bytes-chunk generator to a path or binary file object.
+    """
+    if isinstance(dest, (str, bytes)) or hasattr(dest, "__fspath__"):
+        with open(dest, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    else:
+        for chunk in chunks:
+            dest.write(chunk)
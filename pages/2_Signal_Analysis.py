@@ -2,26 +2,105 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from time_series_plotter import TimeSeriesPlotter
-from signal_analysis import signal_analysis
+from plotter_session import load_plotter, wait_for_data
+from signal_analysis import signal_analysis, detect_transients
 
 st.set_page_config(layout="wide")
 st.title("🔍 Signal Analysis — Oscillatory Behavior")
 
+
+def render_fit(t, x, var, remove_static, heading):
+    """
+    Fit the damped cosine model to one signal and show the plot and parameters.
+    """
+    sa = signal_analysis(t, x)
+    approx, filtered, results = sa.fit(remove_static=remove_static)
+
+    st.markdown(f"#### 📉 Signal: {heading}")
+
+    fig = go.Figure()
+
+    # Original signal on left axis
+    fig.add_trace(go.Scatter(
+        x=t, y=x, name="Original",
+        yaxis="y", line=dict(color='gray', dash='dot')
+    ))
+
+    # Filtered signal on right axis
+    fig.add_trace(go.Scatter(
+        x=t, y=filtered, name="Filtered",
+        yaxis="y2", line=dict(color='orange')
+    ))
+
+    # Fitted curve on right axis
+    fig.add_trace(go.Scatter(
+        x=t, y=approx, name="Fitted",
+        yaxis="y2", line=dict(color='blue', dash='dash')
+    ))
+
+    fig.update_layout(
+        title=f"Signal Fit — {var}",
+        xaxis=dict(
+            title="Time (s)",
+            showgrid=True,
+            gridcolor="#444",
+            minor=dict(showgrid=True, gridcolor="#888", nticks=5)
+        ),
+        yaxis=dict(
+            title="Original Signal",
+            showgrid=True,
+            gridcolor="#444",
+            minor=dict(showgrid=True, gridcolor="#888", nticks=5)
+        ),
+        yaxis2=dict(
+            title="Filtered & Fitted",
+            overlaying="y",
+            anchor="free",
+            side="right",
+            position=1.0,
+            tickmode="sync",
+            showgrid=True,
+            gridcolor="#444",
+            minor=dict(showgrid=True, gridcolor="#888", nticks=5)
+        ),
+        legend=dict(x=0.01, y=0.99),
+        hovermode="x unified"
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("### 🧮 Fitted Parameters")
+
+    st.markdown(f"""
+    $$
+    \\begin{{aligned}}
+    A &= {results['A']:.3f} \\\\
+    \\zeta &= {results['zeta']:.4f} \\quad \\text{{(damping ratio, unitless)}} \\\\
+    \\omega_n &= {results['omega_n']:.3f} \\ \\text{{rad/s}} \\quad \\text{{(natural frequency)}} \\\\
+    \\phi &= {results['phi']:.3f} \\ \\text{{rad}} \\quad \\text{{(phase shift)}} \\\\
+    \\omega_d &= {results['omega_d']:.3f} \\ \\text{{rad/s}} \\quad \\text{{(damped frequency)}} \\\\
+    \\delta &= {results['delta']:.3f} \\ \\text{{1/s}} \\quad \\text{{(damping coefficient)}} \\\\
+    T &= {results['T']:.3f} \\ \\text{{s}} \\quad \\text{{(period)}} \\\\
+    t_2 &= {results['t2 (half/double)']:.3f} \\ \\text{{s}} \\quad \\text{{(time to half/double)}}
+    \\end{{aligned}}
+    $$
+    """, unsafe_allow_html=True)
+
+
 uploaded_file = st.file_uploader(
-    "Upload your CSV file", type="csv",
-    help="Upload a CSV file containing flight test time series data."
+    "Upload your CSV file", type=["csv", "gz", "zst"],
+    help="Upload a CSV file (optionally gzip or zstd compressed) containing flight test time series data."
 )
-delimiter = st.radio("Select CSV delimiter", [",", ";"], index=0, horizontal=True)
+delimiter = st.radio("Select CSV delimiter", ["Auto", ",", ";"], index=0, horizontal=True)
 
 if uploaded_file:
-    plotter = TimeSeriesPlotter(uploaded_file, delimiter=delimiter)
-    all_vars = [col for col in plotter.df.columns if col not in ["Time", "time_seconds", "time_from_zero"]]
+    plotter = load_plotter(uploaded_file, delimiter)
+    all_vars = [col for col in plotter.columns if col not in ["Time", "time_seconds", "time_from_zero"]]
 
     plot_type = st.selectbox(
         "Choose plot type",
-        ["Timeplot", "Testplot"],
-        help="Choose how to select the signal range: \n- Timeplot: filter by time range \n- Testplot: filter by test point and active flag"
+        ["Timeplot", "Testplot", "Auto-detect"],
+        help="Choose how to select the signal range: \n- Timeplot: filter by time range \n- Testplot: filter by test point and active flag \n- Auto-detect: find oscillatory transients over the whole flight"
     )
     
     
@@ -34,6 +113,7 @@ if uploaded_file:
         tfin = st.text_input("End time (in seconds)", value="")
 
         if st.button("📊 Generate Timeplot") and variables:
+            wait_for_data(plotter)
             for var in variables:
                 data = plotter.timeplot_data([var], time_type=1, tini=float(tini), tfin=float(tfin) if tfin else None)
                 if not data:
@@ -43,84 +123,13 @@ if uploaded_file:
                 t = np.array(data[0]["x"])
                 x = np.array(data[0]["y"])
 
-                sa = signal_analysis(t, x)
-                approx, filtered, results = sa.fit(remove_static=remove_static)
-
-                
-                st.markdown(f"#### 📉 Signal: {var}")
-                
-                fig = go.Figure()
-
-                # Original signal on left axis
-                fig.add_trace(go.Scatter(
-                    x=t, y=x, name="Original",
-                    yaxis="y", line=dict(color='gray', dash='dot')
-                ))
-                
-                # Filtered signal on right axis
-                fig.add_trace(go.Scatter(
-                    x=t, y=filtered, name="Filtered",
-                    yaxis="y2", line=dict(color='orange')
-                ))
-                
-                # Fitted curve on right axis
-                fig.add_trace(go.Scatter(
-                    x=t, y=approx, name="Fitted",
-                    yaxis="y2", line=dict(color='blue', dash='dash')
-                ))
-                
-                fig.update_layout(
-                    title=f"Signal Fit — {var}",
-                    xaxis=dict(
-                        title="Time (s)",
-                        showgrid=True,
-                        gridcolor="#444",
-                        minor=dict(showgrid=True, gridcolor="#888", nticks=5)
-                    ),
-                    yaxis=dict(
-                        title="Original Signal",
-                        showgrid=True,
-                        gridcolor="#444",
-                        minor=dict(showgrid=True, gridcolor="#888", nticks=5)
-                    ),
-                    yaxis2=dict(
-                        title="Filtered & Fitted",
-                        overlaying="y",
-                        anchor="free",
-                        side="right",
-                        position=1.0,
-                        tickmode="sync",
-                        showgrid=True,
-                        gridcolor="#444",
-                        minor=dict(showgrid=True, gridcolor="#888", nticks=5)
-                    ),
-                    legend=dict(x=0.01, y=0.99),
-                    hovermode="x unified"
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-
-                st.markdown("### 🧮 Fitted Parameters")
-
-                st.markdown(f"""
-                $$
-                \\begin{{aligned}}
-                A &= {results['A']:.3f} \\\\
-                \\zeta &= {results['zeta']:.4f} \\quad \\text{{(damping ratio, unitless)}} \\\\
-                \\omega_n &= {results['omega_n']:.3f} \\ \\text{{rad/s}} \\quad \\text{{(natural frequency)}} \\\\
-                \\phi &= {results['phi']:.3f} \\ \\text{{rad}} \\quad \\text{{(phase shift)}} \\\\
-                \\omega_d &= {results['omega_d']:.3f} \\ \\text{{rad/s}} \\quad \\text{{(damped frequency)}} \\\\
-                \\delta &= {results['delta']:.3f} \\ \\text{{1/s}} \\quad \\text{{(damping coefficient)}} \\\\
-                T &= {results['T']:.3f} \\ \\text{{s}} \\quad \\text{{(period)}} \\\\
-                t_2 &= {results['t2 (half/double)']:.3f} \\ \\text{{s}} \\quad \\text{{(time to half/double)}}
-                \\end{{aligned}}
-                $$
-                """, unsafe_allow_html=True)
+                render_fit(t, x, var, remove_static, var)
 
     elif plot_type == "Testplot":
         variables = st.multiselect("Select variable(s) to analyze", all_vars)
         remove_static = st.checkbox("Remove static offset using high-pass filter")
-        test_points = sorted(plotter.df["test_point"].dropna().unique().astype(int))
+        wait_for_data(plotter)
+        test_points = plotter.test_points
         test = st.selectbox("Select Test Point", options=test_points)
         active_value = st.radio("Active State", [0, 1], horizontal=True)
 
@@ -134,75 +143,49 @@ if uploaded_file:
                 t = np.array(data[0]["x"])
                 x = np.array(data[0]["y"])
 
-                sa = signal_analysis(t, x)
-                approx, filtered, results = sa.fit(remove_static=remove_static)
-
-
-                st.markdown(f"#### 📉 Signal: {var} (Test Point {test})")
-                fig = go.Figure()
-
-                # Original signal on left axis
-                fig.add_trace(go.Scatter(
-                    x=t, y=x, name="Original",
-                    yaxis="y", line=dict(color='gray', dash='dot')
-                ))
-                
-                # Filtered signal on right axis
-                fig.add_trace(go.Scatter(
-                    x=t, y=filtered, name="Filtered",
-                    yaxis="y2", line=dict(color='orange')
-                ))
-                
-                # Fitted curve on right axis
-                fig.add_trace(go.Scatter(
-                    x=t, y=approx, name="Fitted",
-                    yaxis="y2", line=dict(color='blue', dash='dash')
-                ))
-                
-                fig.update_layout(
-                    title=f"Signal Fit — {var}",
-                    xaxis=dict(
-                        title="Time (s)",
-                        showgrid=True,
-                        gridcolor="#444",
-                        minor=dict(showgrid=True, gridcolor="#888", nticks=5)
-                    ),
-                    yaxis=dict(
-                        title="Original Signal",
-                        showgrid=True,
-                        gridcolor="#444",
-                        minor=dict(showgrid=True, gridcolor="#888", nticks=5)
-                    ),
-                    yaxis2=dict(
-                        title="Filtered & Fitted",
-                        overlaying="y",
-                        anchor="free",
-                        side="right",
-                        position=1.0,
-                        tickmode="sync",
-                        showgrid=True,
-                        gridcolor="#444",
-                        minor=dict(showgrid=True, gridcolor="#888", nticks=5)
-                    ),
-                    legend=dict(x=0.01, y=0.99),
-                    hovermode="x unified"
+                render_fit(t, x, var, remove_static, f"{var} (Test Point {test})")
+
+    elif plot_type == "Auto-detect":
+        variables = st.multiselect("Select variable(s) to scan", all_vars)
+        remove_static = st.checkbox("Remove static offset using high-pass filter")
+
+        st.markdown("### Detection Settings")
+        window = st.number_input("Energy window (s)", min_value=0.05, value=1.0, step=0.25,
+                                 help="Length of the rolling RMS window; roughly one period of the slowest mode of interest")
+        threshold = st.number_input("Threshold (robust std above noise floor)", min_value=1.0, value=5.0, step=0.5)
+        min_duration = st.number_input("Minimum duration (s)", min_value=0.0, value=1.0, step=0.5)
+
+        if st.button("🔎 Detect transients") and variables:
+            wait_for_data(plotter)
+            # Tagged with the loaded file so windows from a previous upload are never offered
+            st.session_state["transients"] = {
+                "plotter_key": st.session_state["plotter_key"],
+                "candidates": detect_transients(
+                    plotter.df["time_from_zero"], plotter.df, names=variables, window=window,
+                    threshold=threshold, min_duration=min_duration
                 )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                st.markdown("### 🧮 Fitted Parameters")
-
-                st.markdown(f"""
-                $$
-                \\begin{{aligned}}
-                A &= {results['A']:.3f} \\\\
-                \\zeta &= {results['zeta']:.4f} \\quad \\text{{(damping ratio, unitless)}} \\\\
-                \\omega_n &= {results['omega_n']:.3f} \\ \\text{{rad/s}} \\quad \\text{{(natural frequency)}} \\\\
-                \\phi &= {results['phi']:.3f} \\ \\text{{rad}} \\quad \\text{{(phase shift)}} \\\\
-                \\omega_d &= {results['omega_d']:.3f} \\ \\text{{rad/s}} \\quad \\text{{(damped frequency)}} \\\\
-                \\delta &= {results['delta']:.3f} \\ \\text{{1/s}} \\quad \\text{{(damping coefficient)}} \\\\
-                T &= {results['T']:.3f} \\ \\text{{s}} \\quad \\text{{(period)}} \\\\
-                t_2 &= {results['t2 (half/double)']:.3f} \\ \\text{{s}} \\quad \\text{{(time to half/double)}}
-                \\end{{aligned}}
-                $$
-                """, unsafe_allow_html=True)
+            }
+
+        transients = st.session_state.get("transients")
+        if transients and transients["plotter_key"] != st.session_state["plotter_key"]:
+            transients = st.session_state["transients"] = None
+        candidates = [c for c in transients["candidates"] if c["channel"] in variables] if transients else []
+        if candidates:
+            st.markdown("### Candidate Windows")
+            st.dataframe(pd.DataFrame(candidates), use_container_width=True)
+
+            selected = st.selectbox(
+                "Select window to fit", range(len(candidates)),
+                format_func=lambda i: f"{candidates[i]['channel']}: {candidates[i]['tini']:.2f}–{candidates[i]['tfin']:.2f} s "
+                                      f"(score {candidates[i]['score']:.1f}, amplitude {candidates[i]['amplitude']:.3g})"
+            )
+
+            if st.button("📊 Fit selected window"):
+                c = candidates[selected]
+                data = plotter.timeplot_data([c["channel"]], time_type=1, tini=c["tini"], tfin=c["tfin"])
+                if data:
+                    t = np.array(data[0]["x"])
+                    x = np.array(data[0]["y"])
+                    render_fit(t, x, c["channel"], remove_static, f"{c['channel']} ({c['tini']:.2f}–{c['tfin']:.2f} s)")
+        elif transients and variables:
+            st.info("No transients found for the selected variables.")
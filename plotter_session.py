@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Session helpers shared by the Streamlit pages: one TimeSeriesPlotter per uploaded
+file, kept across reruns and page switches, loaded on a background thread.
+"""
+import streamlit as st
+from time_series_plotter import TimeSeriesPlotter
+
+
+def load_plotter(uploaded_file, delimiter):
+    key = (uploaded_file.file_id, delimiter)
+    if st.session_state.get("plotter_key") != key:
+        if st.session_state.get("plotter") is not None:
+            st.session_state["plotter"].stop()  # don't keep parsing a file that was replaced
+        st.session_state["plotter"] = TimeSeriesPlotter(
+            uploaded_file, delimiter=None if delimiter == "Auto" else delimiter, background=True
+        )
+        st.session_state["plotter_key"] = key
+    return st.session_state["plotter"]
+
+
+def wait_for_data(plotter):
+    if plotter.ready:
+        plotter.wait()
+        return
+    progress = st.progress(plotter.progress, text="Loading data...")
+    while not plotter.wait(timeout=0.2):
+        progress.progress(plotter.progress, text="Loading data...")
+    progress.empty()
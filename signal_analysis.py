@@ -5,8 +5,7 @@ Created on Tue Apr 15 12:40:05 2025
 @author: javie
 """
 import numpy as np
-from scipy.optimize import curve_fit
-from scipy.signal import butter, filtfilt
+# scipy.optimize and scipy.signal are imported where used: they dominate startup time
 
 
 class signal_analysis:
@@ -22,6 +21,8 @@ class signal_analysis:
         """
         Fit the damped cosine model. Optionally remove static offset with high-pass filtering.
         """
+        from scipy.optimize import curve_fit
+
         x_input = self.x.copy()
     
         if remove_static:
@@ -59,7 +60,128 @@ class signal_analysis:
 
 
 def butter_highpass_filter(data, cutoff, fs, order=8):
+    from scipy.signal import butter, filtfilt
+
     nyq = 0.5 * fs
     normal_cutoff = cutoff / nyq
     b, a = butter(order, normal_cutoff, btype='high', analog=False)
-    return filtfilt(b, a, data)
\ No newline at end of file
+    return filtfilt(b, a, data)
+
+
+def _window_bounds(size, n):
+    """
+    [lo, hi) sample bounds of a centered window of n samples, clipped at the edges.
+    """
+    idx = np.arange(size)
+    return np.clip(idx - n // 2, 0, size), np.clip(idx - n // 2 + n, 0, size)
+
+
+def _rolling_mean(x, bounds):
+    """
+    Centered rolling mean of a 1-D signal via cumulative sums (edges use the
+    samples available).
+    """
+    lo, hi = bounds
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    out = c[hi]
+    out -= c[lo]
+    out /= hi - lo
+    return out
+
+
+def _columns(amplitude, names):
+    """
+    Yields (name, 1-D array) per channel without copying a DataFrame's columns together.
+    """
+    if hasattr(amplitude, "columns"):
+        names = list(amplitude.columns) if names is None else names
+        for name in names:
+            yield name, amplitude[name].to_numpy()
+        return
+    x = np.asarray(amplitude)
+    if x.ndim == 1:
+        x = x[:, None]
+    names = list(range(x.shape[1])) if names is None else names
+    for j, name in enumerate(names):
+        yield name, x[:, j]
+
+
+def detect_transients(time, amplitude, names=None, window=1.0, threshold=5.0,
+                      min_duration=1.0, pad=0.5, max_candidates=20):
+    """
+    Find oscillatory transients (pulses, doublets...) in one or more channels.
+
+    amplitude is (n,), (n, channels) or a DataFrame whose `names` columns are scanned
+    one at a time. Each channel is detrended with a rolling mean over 4*window seconds,
+    then the rolling RMS over `window` seconds is compared to the channel noise floor
+    (median + threshold * robust std). Regions above it, merged across gaps shorter
+    than `window` and lasting at least `min_duration`, are returned padded by `pad`
+    seconds and ranked by score, the peak RMS over the channel noise floor, so
+    channels in different units compare fairly:
+    [{"channel", "tini", "tfin", "score", "amplitude", "rms"}, ...]
+    Rows with a missing time are ignored.
+    """
+    from scipy.signal import hilbert
+
+    t = np.asarray(time, dtype=float)
+    valid = ~np.isnan(t)
+    all_valid = valid.all()
+    if not all_valid:
+        t = t[valid]
+    if len(t) < 2:
+        return []
+
+    # Mean sample rate: robust to repeated timestamps (ms resolution at >= 1 kHz, duplicated rows)
+    span = t[-1] - t[0]
+    if not span > 0:
+        return []
+    fs = (len(t) - 1) / span
+    n = max(int(round(window * fs)), 1)
+    trend_bounds = _window_bounds(len(t), 4 * n)
+    rms_bounds = _window_bounds(len(t), n)
+
+    candidates = []
+    for name, x in _columns(amplitude, names):
+        # One channel at a time keeps the working set to a few 1-D arrays
+        x = np.asarray(x, dtype=float) if all_valid else np.asarray(x, dtype=float)[valid]
+        missing = np.isnan(x)
+        if missing.all():
+            continue
+        # Fill gaps with the channel mean so they carry no energy
+        x = np.where(missing, np.nanmean(x), x)
+        detrended = x - _rolling_mean(x, trend_bounds)
+        del x
+        rms = np.sqrt(_rolling_mean(detrended**2, rms_bounds))
+
+        median = np.median(rms)
+        spread = 1.4826 * np.median(np.abs(rms - median))
+        active = rms > median + threshold * max(spread, np.finfo(float).eps)
+        floor = max(median, np.finfo(float).eps)
+
+        edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)  # exclusive
+        if len(starts) == 0:
+            continue
+
+        keep = np.concatenate([[True], starts[1:] - ends[:-1] > n])
+        starts = starts[keep]
+        ends = ends[np.append(keep[1:], True)]
+
+        for s, e in zip(starts, ends):
+            if t[e - 1] - t[s] < min_duration:
+                continue
+            # Envelope only around the candidate, with a window of margin against edge effects
+            lo, hi = max(s - n, 0), min(e + n, len(t))
+            envelope = np.abs(hilbert(detrended[lo:hi]))[s - lo:e - lo]
+            candidates.append({
+                "channel": name,
+                "tini": float(max(t[s] - pad, t[0])),
+                "tfin": float(min(t[e - 1] + pad, t[-1])),
+                "score": float(rms[s:e].max() / floor),
+                "amplitude": float(envelope.max()),
+                "rms": float(rms[s:e].max())
+            })
+
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    return candidates[:max_candidates]
\ No newline at end of file
@@ -5,15 +5,283 @@ Created on Thu Apr 10 16:57:58 2025
 @author: javie
 """
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import csv
+import gzip
+import io
+import os
+import tempfile
+import threading
+import numpy as np
+import data_export
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class _ColumnStore:
+    """
+    Append-only columnar store. Numeric columns are appended to one file per column
+    on disk and handed back as memory-mapped arrays, so parsing only ever holds one
+    chunk in RAM. Text columns (e.g. "Time") are kept in memory as Arrow strings:
+    much more compact than Python objects, but memory is only bounded for the
+    numeric columns.
+    """
+    def __init__(self):
+        self._dir = tempfile.TemporaryDirectory(prefix="ft_data_", ignore_cleanup_errors=True)
+        self._files = {}    # name -> (open file, dtype)
+        self._objects = {}  # name -> list of Series
+        self._order = []
+        self.rows = 0
+
+    def _path(self, name):
+        return os.path.join(self._dir.name, f"{self._order.index(name)}.bin")
+
+    def append(self, chunk):
+        for name, series in chunk.items():
+            numeric = isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf"
+            values = series.to_numpy() if numeric else np.empty(0, dtype=object)
+            if name not in self._order:
+                self._order.append(name)
+                if numeric:
+                    self._files[name] = (open(self._path(name), "wb"), values.dtype)
+                else:
+                    self._objects[name] = []
+
+            if name in self._files:
+                f, dtype = self._files[name]
+                common = np.result_type(dtype, values.dtype)
+                if common.kind not in "biuf":
+                    self._to_objects(name)
+                elif common != dtype:
+                    self._retype(name, common)
+                    f, dtype = self._files[name]
+
+            if name in self._files:
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            else:
+                self._objects[name].append(self._as_text(series))
+        self.rows += len(chunk)
+
+    @staticmethod
+    def _as_text(series):
+        # read_csv gives object columns before pandas 3; Arrow strings avoid a Python object per cell
+        return series.reset_index(drop=True).astype("string[pyarrow]")
+
+    def _read_back(self, name):
+        f, dtype = self._files.pop(name)
+        f.close()
+        return self._path(name), dtype
+
+    def _retype(self, name, dtype):
+        # A later chunk widened the column (e.g. int -> float when NaNs appear)
+        path, old = self._read_back(name)
+        tmp = path + ".tmp"
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            while block := src.read(old.itemsize * DEFAULT_CHUNKSIZE):
+                dst.write(np.frombuffer(block, dtype=old).astype(dtype).tobytes())
+        os.replace(tmp, path)
+        self._files[name] = (open(path, "ab"), dtype)
+
+    def _to_objects(self, name):
+        path, dtype = self._read_back(name)
+        self._objects[name] = [self._as_text(pd.Series(np.fromfile(path, dtype=dtype)))]
+        os.remove(path)
+
+    def to_frame(self):
+        data = {}
+        for name in self._order:
+            if name in self._files:
+                path, dtype = self._read_back(name)
+                data[name] = (np.memmap(path, dtype=dtype, mode="c", shape=(self.rows,))
+                              if self.rows else np.empty(0, dtype=dtype))
+            else:
+                parts = self._objects.pop(name)
+                data[name] = pd.concat(parts, ignore_index=True)
+                parts.clear()
+        # copy=False keeps the memory-mapped columns as they are instead of consolidating them
+        return pd.DataFrame(data, copy=False)
+
+    def close(self):
+        """
+        Drops a partially built store and its files.
+        """
+        for name in list(self._files):
+            self._read_back(name)
+        self._objects.clear()
+        self._dir.cleanup()
+
 
 class TimeSeriesPlotter:
-    def __init__(self, csv_path, delimiter=","):
-        #delimiter = self.detect_delimiter(csv_path)
-        self.df = pd.read_csv(csv_path, delimiter=delimiter)
-        self.df = self._add_time_from_zero(self.df)
+    def __init__(self, csv_path, delimiter=None, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None,
+                 background=False):
+        """
+        Load a CSV (plain, gzip or zstd) in chunks of `chunksize` rows.
+        If `delimiter` is None it is detected from the first bytes of the file.
+        `progress_callback`, if given, is called with the fraction of the input read.
+        With `background=True` only the header is read here: the data, time conversion,
+        segment indexes and statistics are built on a thread. Poll `ready`/`progress`
+        or call `wait()`; accessing `df`, `segments`, `test_points` or `stats` blocks
+        until loading is done. `stop()` abandons a load that is no longer needed.
+        """
+        if delimiter is None:
+            delimiter = self.detect_delimiter(csv_path)
+        self.columns = self._read_header(csv_path, delimiter)
+        self.progress = 0.0
+        self._error = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+
+        args = (csv_path, delimiter, chunksize, progress_callback)
+        if background:
+            threading.Thread(target=self._load, args=args, daemon=True).start()
+        else:
+            self._load(*args)
+            self.wait()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    @property
+    def df(self):
+        self.wait()
+        return self._df
+
+    @property
+    def segments(self):
+        self.wait()
+        return self._segments
+
+    @property
+    def test_points(self):
+        self.wait()
+        return self._test_points
+
+    @property
+    def stats(self):
+        self.wait()
+        return self._stats
+
+    def stop(self):
+        """
+        Asks the loader to stop after the current chunk and discard what it has read.
+        """
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until loading is done (or `timeout` seconds). Returns True when ready
+        and re-raises any error from the loader.
+        """
+        if not self._ready.wait(timeout):
+            return False
+        if self._error is not None:
+            raise self._error
+        return True
+
+    def _load(self, csv_path, delimiter, chunksize, progress_callback=None):
+        def report(fraction):
+            self.progress = fraction
+            if progress_callback is not None:
+                progress_callback(fraction)
+
+        try:
+            self._df = self._read_chunked(csv_path, delimiter, chunksize, report)
+            self._build_indexes(self._df)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def _build_indexes(self, df):
+        """
+        Positional rows of every test point (one groupby pass) and the range of the time columns.
+        """
+        if "test_point" in df.columns:
+            self._segments = df["test_point"].groupby(df["test_point"], sort=True).indices
+        else:
+            self._segments = {}
+        self._test_points = [int(test) for test in self._segments]
+        self._stats = df[["time_seconds", "time_from_zero"]].agg(["min", "max"])
+
+    def _open_source(self, csv_path):
+        """
+        Returns the raw binary source and its size in bytes.
+        """
+        if isinstance(csv_path, (str, os.PathLike)):
+            return open(csv_path, "rb"), os.path.getsize(csv_path)
+        csv_path.seek(0, io.SEEK_END)
+        size = csv_path.tell()
+        csv_path.seek(0)
+        return csv_path, size
+
+    def _decompressed(self, raw):
+        """
+        Wraps a binary source in a streaming decompressor based on its magic bytes.
+        """
+        magic = raw.read(4)
+        raw.seek(0)
+        if magic.startswith(GZIP_MAGIC):
+            return gzip.GzipFile(fileobj=raw, mode="rb")
+        if magic.startswith(ZSTD_MAGIC):
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("Reading .zst files requires the 'zstandard' package.")
+            return zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+        return raw
+
+    def _close_source(self, raw, csv_path):
+        if raw is not csv_path:
+            raw.close()
+        else:
+            raw.seek(0)  # Reset for later reads
+
+    def _read_header(self, csv_path, delimiter):
+        raw, _ = self._open_source(csv_path)
+        text = io.TextIOWrapper(self._decompressed(raw), encoding="utf-8", newline="")
+        try:
+            return list(pd.read_csv(text, delimiter=delimiter, nrows=0).columns)
+        finally:
+            text.detach()
+            self._close_source(raw, csv_path)
+
+    def _read_chunked(self, csv_path, delimiter, chunksize, progress_callback=None):
+        raw, size = self._open_source(csv_path)
+        text = io.TextIOWrapper(self._decompressed(raw), encoding="utf-8", newline="")
+        t0 = None
+        self._store = _ColumnStore()  # keeps the backing files alive as long as the plotter
+        try:
+            for chunk in pd.read_csv(text, delimiter=delimiter, chunksize=chunksize):
+                if self._stop.is_set():
+                    self._store.close()
+                    self._store = None
+                    raise RuntimeError("Loading was stopped.")
+                chunk["time_seconds"] = self._convert_time_column(chunk["Time"])
+                if t0 is None:
+                    t0 = chunk["time_seconds"].iloc[0]
+                chunk["time_from_zero"] = chunk["time_seconds"] - t0
+                self._store.append(chunk)
+                if progress_callback is not None and size:
+                    progress_callback(min(raw.tell() / size, 1.0))
+        finally:
+            text.detach()
+            self._close_source(raw, csv_path)
+
+        if progress_callback is not None:
+            progress_callback(1.0)
+        return self._store.to_frame()
+
+    def _convert_time_column(self, time_col):
+        """
+        Vectorized version of _convert_time_to_seconds for a whole column.
+        """
+        parts = time_col.astype(str).str.split(":", expand=True)
+        if parts.shape[1] != 4:
+            return time_col.apply(self._convert_time_to_seconds).astype(float)
+        parts = parts.apply(pd.to_numeric, errors="coerce")
+        return parts[0] * 86400 + parts[1] * 3600 + parts[2] * 60 + parts[3]
 
     def _convert_time_to_seconds(self, time_str):
         try:
@@ -22,17 +290,22 @@ class TimeSeriesPlotter:
         except:
             return None
 
-    def detect_delimiter(self,uploaded_file):
+    def detect_delimiter(self, csv_path):
         """
-        Detects the delimiter of a CSV file from a Streamlit UploadedFile object.
+        Detects the delimiter of a CSV file (plain, gzip or zstd) from a path or
+        a Streamlit UploadedFile object. Falls back to "," if it cannot be sniffed.
         """
-        uploaded_file.seek(0)  # Reset file pointer to beginning
-        sample = uploaded_file.read(2048).decode('utf-8')  # Read and decode
-        uploaded_file.seek(0)  # Reset again for actual reading later
-        sniffer = csv.Sniffer()
-        dialect = sniffer.sniff(sample)
-        return dialect.delimiter 
-        
+        raw, _ = self._open_source(csv_path)
+        try:
+            sample = self._decompressed(raw).read(2048).decode('utf-8', errors='ignore')
+        finally:
+            self._close_source(raw, csv_path)
+        sample = sample.rsplit("\n", 1)[0]  # Drop the possibly truncated last line
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            return ","
+
     def _seconds_to_time_str(self, total_seconds):
             days = int(total_seconds // 86400)
             hours = int((total_seconds % 86400) // 3600)
@@ -41,7 +314,7 @@ class TimeSeriesPlotter:
             return f"{days:03}:{hours:02}:{minutes:02}:{seconds:06.3f}"
 
     def _add_time_from_zero(self, df):
-        df["time_seconds"] = df["Time"].apply(self._convert_time_to_seconds)
+        df["time_seconds"] = self._convert_time_column(df["Time"])
         df["time_from_zero"] = df["time_seconds"] - df["time_seconds"].iloc[0]
         return df
 
@@ -77,11 +350,11 @@ class TimeSeriesPlotter:
         time_col = "time_seconds" if time_type == 0 else "time_from_zero"
         tini_sec = self._convert_time_to_seconds(tini) if time_type == 0 else tini
         if time_type == 0:
-            tfin_sec = self._convert_time_to_seconds(tfin) if tfin else self.df["time_seconds"].max()
+            tfin_sec = self._convert_time_to_seconds(tfin) if tfin else self.stats.at["max", "time_seconds"]
         else:
-            tfin_sec = tfin if tfin is not None else self.df["time_from_zero"].max()
+            tfin_sec = tfin if tfin is not None else self.stats.at["max", "time_from_zero"]
     
-        if tini_sec < self.df[time_col].min() or tfin_sec > self.df[time_col].max():
+        if tini_sec < self.stats.at["min", time_col] or tfin_sec > self.stats.at["max", time_col]:
             print("Error: Specified time range is outside the available data.")
             return None
     
@@ -96,15 +369,12 @@ class TimeSeriesPlotter:
         if isinstance(variables, str):
             variables = [variables]
     
-        if test not in self.df["test_point"].unique():
+        if test not in self.segments:
             print(f"Error: Test point {test} not found.")
             return None
     
         time_col = "time_seconds" if time_type == 0 else "time_from_zero"
-        df_plot = self.df[
-            (self.df["test_point"] == test) &
-            (self.df["active"] == active_value)
-        ]
+        df_plot = self.df.iloc[self._segment_rows(test, active_value)]
     
         return [
             {"x": df_plot[time_col], "y": df_plot[var], "name": var}
@@ -118,9 +388,9 @@ class TimeSeriesPlotter:
         time_col = "time_seconds" if time_type == 0 else "time_from_zero"
         tini_sec = self._convert_time_to_seconds(tini) if time_type == 0 else tini
         if time_type == 0:
-            tfin_sec = self._convert_time_to_seconds(tfin) if tfin else self.df["time_seconds"].max()
+            tfin_sec = self._convert_time_to_seconds(tfin) if tfin else self.stats.at["max", "time_seconds"]
         else:
-            tfin_sec = tfin if tfin is not None else self.df["time_from_zero"].max()
+            tfin_sec = tfin if tfin is not None else self.stats.at["max", "time_from_zero"]
     
         df_plot = self.df[(self.df[time_col] >= tini_sec) & (self.df[time_col] <= tfin_sec)]
     
@@ -134,17 +404,68 @@ class TimeSeriesPlotter:
         if isinstance(variables_y, str):
             variables_y = [variables_y]
     
-        if test not in self.df["test_point"].unique():
+        if test not in self.segments:
             print(f"Error: Test point {test} not found.")
             return None
     
-        df_plot = self.df[
-            (self.df["test_point"] == test) &
-            (self.df["active"] == active_value)
-        ]
+        df_plot = self.df.iloc[self._segment_rows(test, active_value)]
     
         return [
             {"x": df_plot[variable_x], "y": df_plot[var], "name": var}
             for var in variables_y if var in df_plot.columns
         ]
-    
+
+    def _segment_rows(self, test, active_value):
+        rows = self.segments.get(test, np.empty(0, dtype=np.intp))
+        return rows[self.df["active"].to_numpy()[rows] == active_value]
+
+    def select_rows(self, time_type=0, tini=0, tfin=None, test=None, active_value=1):
+        """
+        Positional indices of the rows in a selection: the time window
+        [tini, tfin], or the rows of a test point with the given active flag
+        when `test` is given.
+        """
+        if test is not None:
+            return self._segment_rows(test, active_value)
+
+        time_col = "time_seconds" if time_type == 0 else "time_from_zero"
+        tini_sec = self._convert_time_to_seconds(tini) if time_type == 0 else tini
+        if time_type == 0:
+            tfin_sec = self._convert_time_to_seconds(tfin) if tfin else self.stats.at["max", "time_seconds"]
+        else:
+            tfin_sec = tfin if tfin is not None else self.stats.at["max", "time_from_zero"]
+
+        mask = (self.df[time_col] >= tini_sec) & (self.df[time_col] <= tfin_sec)
+        return np.flatnonzero(mask.to_numpy())
+
+    def export_data(self, variables, fmt="csv", time_type=0, tini=0, tfin=None, test=None,
+                    active_value=1, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Generator of bytes chunks encoding the selected variables (plus the time column)
+        as "csv", "parquet" or "npz". The selection is written chunk by chunk.
+        """
+        if isinstance(variables, str):
+            variables = [variables]
+
+        time_col = "time_seconds" if time_type == 0 else "time_from_zero"
+        columns = [time_col] + [var for var in variables if var in self.df.columns and var != time_col]
+        rows = self.select_rows(time_type, tini, tfin, test, active_value)
+        return data_export.iter_export(self.df, rows, columns, fmt, chunksize)
+
+    def export_test_points(self, variables, fmt="csv", active_value=1, time_type=0,
+                           chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Generator of bytes chunks of a zip archive holding one file per test point.
+        The rows of every test point come from the segment index built at load time.
+        """
+        if isinstance(variables, str):
+            variables = [variables]
+
+        time_col = "time_seconds" if time_type == 0 else "time_from_zero"
+        columns = [time_col] + [var for var in variables if var in self.df.columns and var != time_col]
+        entries = (
+            (f"test_point_{int(test)}.{fmt}",
+             data_export.iter_export(self.df, self._segment_rows(test, active_value), columns, fmt, chunksize))
+            for test in self.segments
+        )
+        return data_export.iter_zip(entries)